@@ -11,29 +11,55 @@ AdGuard Home DNS 配置转换器
 - 智能格式转换
 - 自动生成合并配置文件
 - 支持分层目录结构（configs子目录存放原始和转换文件，根目录存放合并文件）
+
+设计原则:
+- 热点是逐行的字节串处理而非数值计算，Numba 等 JIT 对字符串支持有限、无法加速，
+  Cython 等编译扩展又会引入构建依赖；逐行工作应交给标准库中 C 实现的原语
+  （预编译正则、bytes.join、set/dict、os.sendfile），Python 层只负责驱动
 """
 
 from __future__ import annotations
 
-import argparse
+import gzip
+import http.client
 import json
+import mmap
+import os
+import random
+import re
+import shutil
+import socket
 import sys
+import threading
 import time
 import urllib.error
+import urllib.parse
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
-from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from itertools import chain
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, BinaryIO
 
 if TYPE_CHECKING:
     from collections.abc import Sequence
 
+# 可选依赖: orjson 解析速度更快且直接接受 bytes，未安装时回退到标准库
+try:
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
 # 常量定义
 CONFIGS_SUBDIR = "configs"
 OUTPUT_FILENAME = "chinalist-for-adguard.txt"
 GITHUB_API_URL = "https://api.github.com/repos/Loyalsoldier/v2ray-rules-dat/releases/latest"
 JSDELIVR_BASE_URL = "https://cdn.jsdelivr.net/gh/Loyalsoldier/v2ray-rules-dat@release/"
+GITHUB_API_VERSION = "2022-11-28"
+GITHUB_TOKEN_ENV = "GITHUB_TOKEN"
 
 # 文件分组
 DOMESTIC_FILES: list[str] = [
@@ -51,14 +77,60 @@ FOREIGN_FILES: list[str] = [
 DEFAULT_DOMESTIC_DNS: list[str] = ["114.114.114.114"]
 DEFAULT_FOREIGN_DNS: list[str] = ["8.8.8.8"]
 
+# 合并文件头部推荐的上游安全DNS服务器
+RECOMMENDED_UPSTREAM_DNS: list[str] = [
+    "tcp://223.5.5.5",
+    "tcp://119.29.29.29",
+    "tcp://1.1.1.1",
+    "tcp://8.8.8.8",
+    "tls://dns.alidns.com",
+    "tls://dot.pub",
+    "tls://dns.google",
+    "tls://one.one.one.one",
+]
+
 # 文件扩展名
 EXT_SOURCE = ".txt"
 EXT_CONVERTED = ".adg.txt"
 
+# 源文件名 -> 转换文件名，只计算一次（str.removesuffix 需要 Python 3.9+）
+CONVERTED_FILENAMES: dict[str, str] = {
+    filename: filename.removesuffix(EXT_SOURCE) + EXT_CONVERTED
+    for filename in DOMESTIC_FILES + FOREIGN_FILES
+}
+
+# 规则行匹配：跳过空行、注释和 regexp: 规则，去除 full: 前缀及首尾空白，捕获域名
+DOMAIN_LINE_PATTERN = re.compile(
+    rb"(?m)^[^\S\n]*(?=\S)(?!#|regexp:)(?:full:|(?!full:))[^\S\n]*(\S(?:[^\n]*\S)?)[^\S\n]*$"
+)
+
+# AdGuardHome 配置行前缀，完整格式为 [/domain/]dns_servers
+ADGUARD_LINE_PREFIX = b"[/"
+
+# 合并文件写缓冲区大小
+WRITE_BUFFER_SIZE = 1 << 20
+# 文件预览读取的最大字节数，足以容纳预览的全部行
+PREVIEW_READ_SIZE = 64 * 1024
+
+# release 信息缓存文件（位于configs子目录）
+RELEASES_ETAG_FILE = ".releases.etag"
+RELEASES_BASE_URL_FILE = ".releases.base_url"
+RELEASES_CACHE_TTL = 3600
+# 各规则文件上次下载时服务器返回的 ETag（位于configs子目录）
+DOWNLOAD_ETAGS_FILE = ".etags.json"
+
 # CDN 配置
 MAX_DOWNLOAD_ATTEMPTS = 3
+CONNECT_TIMEOUT = 5
 DOWNLOAD_TIMEOUT = 10
-RETRY_DELAY = 2
+TCP_KEEPALIVE_IDLE = 30
+# 重试等待采用带随机抖动的指数退避：min(上限, 基数 * 2^(次数-1) + [0, 1) 秒)
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 30
+# 尚无文件下载成功而失败的下载尝试次数达到该值时，视为下载源不可用并放弃其余下载
+DOWNLOAD_ABORT_THRESHOLD = 3
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+HTTP_NOT_MODIFIED = 304
 
 
 @dataclass
@@ -73,11 +145,63 @@ class FileStats:
     """文件处理统计"""
     domestic_count: int = 0
     foreign_count: int = 0
-    unique_domains: set[str] = field(default_factory=set)
+    subsumed_count: int = 0
+    unique_domains: set[bytes] = field(default_factory=set)
 
     @property
     def total_unique(self) -> int:
-        return len(self.unique_domains)
+        # unique_domains 中还包含被上级域名覆盖而未写入的子域名，只统计实际写入的域名
+        return self.domestic_count + self.foreign_count
+
+
+class KeepAliveConnectionMixin:
+    """建连使用较短的连接超时，建连后开启 TCP keepalive 并切换为读超时"""
+
+    def __init__(self, host: str, **kwargs) -> None:
+        kwargs["timeout"] = CONNECT_TIMEOUT
+        super().__init__(host, **kwargs)
+
+    def connect(self) -> None:
+        super().connect()
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, TCP_KEEPALIVE_IDLE)
+        self.sock.settimeout(DOWNLOAD_TIMEOUT)
+
+
+class KeepAliveHTTPConnection(KeepAliveConnectionMixin, http.client.HTTPConnection):
+    """开启 TCP keepalive 的 HTTP 连接"""
+
+
+class KeepAliveHTTPSConnection(KeepAliveConnectionMixin, http.client.HTTPSConnection):
+    """开启 TCP keepalive 的 HTTPS 连接"""
+
+
+class KeepAliveHTTPHandler(urllib.request.HTTPHandler):
+    """使用 KeepAliveHTTPConnection 的 urllib HTTP 处理器"""
+
+    def http_open(self, req: urllib.request.Request) -> http.client.HTTPResponse:
+        return self.do_open(KeepAliveHTTPConnection, req)
+
+
+class KeepAliveHTTPSHandler(urllib.request.HTTPSHandler):
+    """使用 KeepAliveHTTPSConnection 的 urllib HTTPS 处理器"""
+
+    def https_open(self, req: urllib.request.Request) -> http.client.HTTPResponse:
+        return self.do_open(KeepAliveHTTPSConnection, req, context=self._context)
+
+
+class AuthStrippingRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """跨主机或跨协议重定向（如 GitHub 签名下载地址）时不转发认证信息的重定向处理器"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        new_req = super().redirect_request(req, fp, code, msg, headers, newurl)
+        if new_req is not None:
+            old_parts = urllib.parse.urlsplit(req.full_url)
+            new_parts = urllib.parse.urlsplit(new_req.full_url)
+            if (old_parts.scheme, old_parts.netloc) != (new_parts.scheme, new_parts.netloc):
+                new_req.remove_header("Authorization")
+        return new_req
 
 
 class AdGuardConfigConverter:
@@ -86,6 +210,30 @@ class AdGuardConfigConverter:
     def __init__(self) -> None:
         self.output_dir: Path = Path(".")
         self.dns_config = DNSConfig()
+        self._token: str | None = None
+        self._token_loaded = False
+        self._auth_header: str | None = None
+        # 规则文件名 -> 上次下载的 ETag，用于条件请求
+        self._etags: dict[str, str] = {}
+        # 合并文件头部中不随运行变化的部分，预先编码一次
+        self._static_header = (
+            "# 注意: 已自动去除重复域名配置\n\n"
+            "# 推荐的上游安全DNS服务器\n"
+            + "".join(f"{server}\n" for server in RECOMMENDED_UPSTREAM_DNS)
+            + "\n"
+        ).encode()
+        # 代理（*_proxy / no_proxy 环境变量）与重定向由 urllib 处理，连接层使用带 keepalive 的连接类
+        self._opener = urllib.request.build_opener(
+            KeepAliveHTTPHandler, KeepAliveHTTPSHandler, AuthStrippingRedirectHandler
+        )
+        # 并发下载时串行化输出，避免多线程日志交错
+        self._print_lock = threading.Lock()
+        # 下载源不可用时通知各下载线程停止重试
+        self._abort_downloads = threading.Event()
+        # 各下载线程共享的尝试结果统计，用于判断下载源是否不可用
+        self._download_stats_lock = threading.Lock()
+        self._failed_attempts = 0
+        self._download_succeeded = False
 
     def show_usage(self) -> None:
         """显示使用方法"""
@@ -100,6 +248,11 @@ class AdGuardConfigConverter:
                   原始文件和转换文件保存在 {output_dir}/configs/ 目录中
                   合并文件保存在 {output_dir}/ 目录中
 
+环境变量:
+  GITHUB_TOKEN     GitHub API 令牌（可选），设置后 API 限额由每小时 60 次提升至 5000 次
+                  未设置时读取 {output_dir}/token 文件
+  HTTPS_PROXY      代理地址（可选），如 http://127.0.0.1:7890；NO_PROXY 指定直连的主机
+
 示例:
   python3 adguardhome_dns.py 114.114.114.114                          # 只指定国内DNS（国外使用相同DNS）
   python3 adguardhome_dns.py 114.114.114.114 --foreign 8.8.8.8       # 分别指定国内外DNS
@@ -116,6 +269,14 @@ class AdGuardConfigConverter:
 
     def parse_arguments(self) -> None:
         """解析命令行参数"""
+        # 无参数时直接使用默认配置，省去导入 argparse 和构造解析器的开销
+        if len(sys.argv) == 1:
+            self.output_dir = Path(".").resolve()
+            self._print_config()
+            return
+
+        import argparse
+
         parser = argparse.ArgumentParser(
             description="AdGuard Home DNS 配置转换器",
             formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -189,47 +350,125 @@ class AdGuardConfigConverter:
 
     def _ensure_directory(self, path: Path, description: str) -> None:
         """确保目录存在，不存在则创建"""
-        if not path.exists():
-            print(f"创建{description}: {path}")
+        # 直接尝试创建，省去一次 stat 并避免检查与创建之间的竞态
+        try:
             path.mkdir(parents=True)
+        except FileExistsError:
+            return
+        print(f"创建{description}: {path}")
 
     @property
     def configs_dir(self) -> Path:
         """获取configs子目录路径"""
         return self.output_dir / CONFIGS_SUBDIR
 
+    def _log(self, message: str) -> None:
+        """线程安全地输出一行日志"""
+        with self._print_lock:
+            print(message)
+
     def get_token(self) -> str | None:
-        """从token文件获取GitHub API令牌"""
+        """获取GitHub API令牌，首次读取后缓存"""
+        if not self._token_loaded:
+            self._token = self._load_token()
+            self._auth_header = f"Bearer {self._token}" if self._token else None
+            self._token_loaded = True
+        return self._token
+
+    def get_auth_header(self) -> str | None:
+        """获取 Authorization 请求头的值，与令牌一同缓存，无令牌时返回None"""
+        self.get_token()
+        return self._auth_header
+
+    def _load_token(self) -> str | None:
+        """读取GitHub API令牌，优先使用 GITHUB_TOKEN 环境变量，其次读取token文件"""
+        token = os.environ.get(GITHUB_TOKEN_ENV, "").strip()
+        if token:
+            return token
+
         token_file = self.output_dir / "token"
         try:
             return token_file.read_text().strip()
         except FileNotFoundError:
-            print("警告: 未找到 token 文件，使用默认令牌可能会受限")
+            self._log(f"警告: 未设置 {GITHUB_TOKEN_ENV} 环境变量且未找到 token 文件，匿名访问 API 会受限")
+            return None
+
+    def _open_url(self, url: str, headers: dict[str, str]) -> http.client.HTTPResponse:
+        """发送GET请求，自动处理代理和重定向，非2xx响应抛出 HTTPError"""
+        return self._opener.open(urllib.request.Request(url, headers=headers))
+
+    @staticmethod
+    def _decoded_body(response: http.client.HTTPResponse) -> BinaryIO:
+        """按 Content-Encoding 返回解压后的响应体"""
+        if (response.getheader("Content-Encoding") or "").lower() == "gzip":
+            return gzip.GzipFile(fileobj=response)
+        return response
+
+    @staticmethod
+    def _read_cache(path: Path) -> str | None:
+        """读取缓存文件内容，不存在或为空时返回None"""
+        try:
+            return path.read_text(encoding="utf-8").strip() or None
+        except FileNotFoundError:
             return None
 
+    @staticmethod
+    def _write_cache(path: Path, content: str) -> None:
+        """原子写入缓存文件，避免中断时留下不完整内容"""
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(content, encoding="utf-8")
+        os.replace(tmp_path, path)
+
     def get_latest_release_info(self) -> str | None:
         """获取最新release信息，失败时返回None表示使用备用CDN"""
         print("获取最新 release 信息...")
-        token = self.get_token()
-        try:
-            req = urllib.request.Request(
-                GITHUB_API_URL,
-                headers={
-                    "User-Agent": "Mozilla/5.0 (compatible; AdGuardConfigConverter/1.0)",
-                    "Authorization": f"Bearer {token}" if token else "Bearer GITHUB_TOKEN",
-                },
-            )
+        etag_file = self.configs_dir / RELEASES_ETAG_FILE
+        base_url_file = self.configs_dir / RELEASES_BASE_URL_FILE
+        cached_etag = self._read_cache(etag_file)
+        cached_base_url = self._read_cache(base_url_file)
 
-            with urllib.request.urlopen(req, timeout=DOWNLOAD_TIMEOUT) as response:
-                data = json.loads(response.read().decode())
+        # 缓存在有效期内则直接使用，省去一次 API 往返
+        if cached_base_url and time.time() - base_url_file.stat().st_mtime < RELEASES_CACHE_TTL:
+            print(f"使用缓存的下载基础URL: {cached_base_url}")
+            return cached_base_url
+
+        auth_header = self.get_auth_header()
+        try:
+            headers = {
+                "User-Agent": "Mozilla/5.0 (compatible; AdGuardConfigConverter/1.0)",
+                "Accept-Encoding": "gzip",
+                "X-GitHub-Api-Version": GITHUB_API_VERSION,
+            }
+            # 认证请求的限额为每小时 5000 次，匿名请求仅 60 次
+            if auth_header:
+                headers["Authorization"] = auth_header
+            # 携带上次的 ETag 发起条件请求，未变化时服务器返回 304 且不计入完整响应
+            if cached_etag and cached_base_url:
+                headers["If-None-Match"] = cached_etag
+
+            with self._open_url(GITHUB_API_URL, headers) as response:
+                etag = response.getheader("ETag")
+                data = json_loads(self._decoded_body(response).read())
 
             base_url = self._extract_base_url(data)
             if base_url:
                 print(f"下载基础URL: {base_url}")
+                self._write_cache(base_url_file, base_url)
+                if etag:
+                    self._write_cache(etag_file, etag)
                 return base_url
             raise ValueError("未找到有效的下载URL")
 
-        except (urllib.error.URLError, ValueError) as e:
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            if (
+                isinstance(e, urllib.error.HTTPError)
+                and e.code == HTTP_NOT_MODIFIED
+                and cached_base_url
+            ):
+                print(f"release 未更新，使用缓存的下载基础URL: {cached_base_url}")
+                # 刷新缓存时间，重新开始计算有效期
+                base_url_file.touch()
+                return cached_base_url
             print(f"警告: 无法获取 GitHub release 信息 - {e}")
             print("将使用 jsdelivr CDN 作为备用下载源")
             return None
@@ -248,14 +487,17 @@ class AdGuardConfigConverter:
     ) -> bool:
         """带重试机制的文件下载，支持主备CDN切换"""
         cdn_urls = self._build_cdn_urls(base_url, filename)
-        token = self.get_token()
+        auth_header = self.get_auth_header()
 
         for cdn_name, url in cdn_urls:
             for attempt in range(1, max_attempts + 1):
-                if self._try_download(url, filename, cdn_name, attempt, max_attempts, token):
+                if self._abort_downloads.is_set():
+                    self._log(f"跳过 {filename}：下载已中止")
+                    return False
+                if self._try_download(url, filename, cdn_name, attempt, max_attempts, auth_header):
                     return True
 
-        print(f"错误: 无法下载 {filename}，所有CDN均已尝试")
+        self._log(f"错误: 无法下载 {filename}，所有CDN均已尝试")
         return False
 
     def _build_cdn_urls(self, base_url: str | None, filename: str) -> list[tuple[str, str]]:
@@ -266,6 +508,16 @@ class AdGuardConfigConverter:
         cdn_urls.append(("jsdelivr CDN", f"{JSDELIVR_BASE_URL}{filename}"))
         return cdn_urls
 
+    @staticmethod
+    def _parse_http_date(value: str | None) -> float | None:
+        """解析 HTTP 日期头为时间戳，缺失或格式错误时返回None（保留本地修改时间）"""
+        if not value:
+            return None
+        try:
+            return parsedate_to_datetime(value).timestamp()
+        except (TypeError, ValueError):
+            return None
+
     def _try_download(
         self,
         url: str,
@@ -273,45 +525,123 @@ class AdGuardConfigConverter:
         cdn_name: str,
         attempt: int,
         max_attempts: int,
-        token: str | None,
+        auth_header: str | None,
     ) -> bool:
         """尝试单次下载"""
         try:
-            print(f"下载 {filename} 从 {cdn_name} (尝试 {attempt}/{max_attempts})...")
+            self._log(f"下载 {filename} 从 {cdn_name} (尝试 {attempt}/{max_attempts})...")
 
-            headers = {"User-Agent": "Mozilla/5.0 (compatible; AdGuardConfigConverter/1.0)"}
-            if cdn_name == "GitHub" and token:
-                headers["Authorization"] = f"Bearer {token}"
+            # 规则文件为高压缩比文本，请求 gzip 编码以减少传输量
+            headers = {
+                "User-Agent": "Mozilla/5.0 (compatible; AdGuardConfigConverter/1.0)",
+                "Accept-Encoding": "gzip",
+            }
+            if cdn_name == "GitHub" and auth_header:
+                headers["Authorization"] = auth_header
 
-            req = urllib.request.Request(url, headers=headers)
             filepath = self.configs_dir / filename
 
-            # 如果文件存在则删除
+            # 本地文件的修改时间即上次下载时服务器的 Last-Modified，连同上次的 ETag 发起条件请求
             if filepath.exists():
-                print(f"删除已存在的文件: {filename}")
-                filepath.unlink()
-
-            with urllib.request.urlopen(req, timeout=DOWNLOAD_TIMEOUT) as response:
-                filepath.write_bytes(response.read())
-
-            print(f"成功下载 {filename} 从 {cdn_name}")
+                headers["If-Modified-Since"] = formatdate(filepath.stat().st_mtime, usegmt=True)
+                etag = self._etags.get(filename)
+                if etag:
+                    headers["If-None-Match"] = etag
+
+            # 先写入临时文件再原子替换，任何一步失败都删除临时文件，不会留下不完整的文件
+            tmp_path = filepath.with_name(filepath.name + ".tmp")
+            try:
+                with self._open_url(url, headers) as response:
+                    with open(tmp_path, "wb") as f:
+                        # 分块写入磁盘，避免将整个文件读入内存
+                        shutil.copyfileobj(self._decoded_body(response), f, DOWNLOAD_CHUNK_SIZE)
+                    # 分块读取时连接提前关闭不会报错，需按 Content-Length 检查是否读完
+                    if response.length:
+                        raise http.client.IncompleteRead(b"", response.length)
+                    mtime = self._parse_http_date(response.getheader("Last-Modified"))
+                    etag = response.getheader("ETag")
+
+                if mtime is not None:
+                    os.utime(tmp_path, (time.time(), mtime))
+                os.replace(tmp_path, filepath)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+            if etag:
+                self._etags[filename] = etag
+            else:
+                self._etags.pop(filename, None)
+
+            self._log(f"成功下载 {filename} 从 {cdn_name}")
+            self._record_attempt(succeeded=True)
             return True
 
         except Exception as e:
-            print(f"从 {cdn_name} 下载失败: {e}")
+            if isinstance(e, urllib.error.HTTPError) and e.code == HTTP_NOT_MODIFIED:
+                self._log(f"{filename} 未更新，沿用本地文件 ({cdn_name})")
+                self._record_attempt(succeeded=True)
+                return True
+            self._log(f"{filename} 从 {cdn_name} 下载失败: {e}")
+            self._record_attempt(succeeded=False)
             if attempt < max_attempts:
-                print("正在重试...")
-                time.sleep(RETRY_DELAY)
+                self._log(f"{filename} 正在重试...")
+                # 随机抖动错开各下载线程的重试时间；放弃下载时立即结束等待
+                delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1) + random.random())
+                self._abort_downloads.wait(delay)
             return False
 
+    def _record_attempt(self, succeeded: bool) -> None:
+        """记录一次下载尝试的结果，尚无成功而失败次数达到阈值时放弃其余下载"""
+        with self._download_stats_lock:
+            if succeeded:
+                self._download_succeeded = True
+                return
+            self._failed_attempts += 1
+            if (
+                self._download_succeeded
+                or self._failed_attempts < DOWNLOAD_ABORT_THRESHOLD
+                or self._abort_downloads.is_set()
+            ):
+                return
+            self._abort_downloads.set()
+            failed_attempts = self._failed_attempts
+        self._log(f"错误: {failed_attempts} 次下载尝试失败且没有任何文件下载成功，放弃其余下载")
+
+    def _read_json_cache(self, cache_filename: str) -> dict:
+        """读取configs子目录中的JSON缓存文件，缺失或损坏时返回空字典"""
+        content = self._read_cache(self.configs_dir / cache_filename)
+        if not content:
+            return {}
+        try:
+            data = json_loads(content)
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
     def download_all_files(self, base_url: str | None) -> bool:
         """下载所有配置文件到configs子目录"""
         print("开始下载 v2ray-rules-dat 配置文件...")
 
         all_files = DOMESTIC_FILES + FOREIGN_FILES
-        success_count = sum(
-            1 for filename in all_files if self.download_file_with_retry(base_url, filename)
-        )
+        # 提交任务前先读取并缓存令牌，避免各下载线程重复读取
+        self.get_token()
+        self._etags = self._read_json_cache(DOWNLOAD_ETAGS_FILE)
+        # 下载为网络 I/O 密集型任务，使用线程池并发下载以重叠网络等待时间
+        executor = ThreadPoolExecutor(max_workers=len(all_files))
+        try:
+            futures = [
+                executor.submit(self.download_file_with_retry, base_url, filename)
+                for filename in all_files
+            ]
+            success_count = sum(future.result() for future in as_completed(futures))
+        except BaseException:
+            # 用户中断（Ctrl-C）等情况下通知各下载线程停止重试，不等待剩余尝试完成
+            self._abort_downloads.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+
+        self._write_cache(self.configs_dir / DOWNLOAD_ETAGS_FILE, json.dumps(self._etags, indent=2))
 
         if success_count == len(all_files):
             print("下载完成！")
@@ -321,167 +651,247 @@ class AdGuardConfigConverter:
         return False
 
     @staticmethod
-    def convert_domain_to_adguard_format(domain: str, dns_servers: Sequence[str]) -> str | None:
-        """将单个域名转换为AdGuardHome格式"""
-        # 处理 full: 前缀
-        if domain.startswith("full:"):
-            domain = domain[5:]
-
-        # 去除首尾空白字符
-        domain = domain.strip()
-
-        # 转换为AdGuardHome格式
-        if domain:
-            dns_str = " ".join(dns_servers)
-            return f"[/{domain}/]{dns_str}"
-        return None
+    def _converted_file_header(source_filename: str, dns_servers: Sequence[str]) -> bytes:
+        """生成转换文件的注释头"""
+        return f"# 使用DNS服务器: {' '.join(dns_servers)}\n# 来源文件: {source_filename}\n\n".encode()
+
+    @staticmethod
+    def _adguard_line_suffix(dns_servers: Sequence[str]) -> bytes:
+        """构造AdGuardHome配置行的后缀（域名之后的部分），每组DNS只需构造一次"""
+        return f"/]{' '.join(dns_servers)}\n".encode()
+
+    @staticmethod
+    def _format_adguard_lines(domains: Sequence[bytes], suffix: bytes) -> bytes:
+        """将域名列表批量格式化为AdGuardHome配置行"""
+        if not domains:
+            return b""
+        return ADGUARD_LINE_PREFIX + (suffix + ADGUARD_LINE_PREFIX).join(domains) + suffix
 
     def convert_file_to_adguard(
         self, input_filename: str, output_filename: str, dns_servers: Sequence[str]
-    ) -> None:
-        """将整个文件转换为AdGuardHome格式"""
+    ) -> list[bytes]:
+        """将整个文件转换为AdGuardHome格式，返回提取出的域名列表"""
         input_path = self.configs_dir / input_filename
         output_path = self.configs_dir / output_filename
 
-        try:
-            with (
-                open(input_path, "r", encoding="utf-8") as infile,
-                open(output_path, "w", encoding="utf-8") as outfile,
-            ):
-                # 添加注释说明
-                outfile.write(f"# 使用DNS服务器: {' '.join(dns_servers)}\n")
-                outfile.write(f"# 来源文件: {input_filename}\n\n")
-
-                # 处理每一行
-                for line in infile:
-                    line = line.strip()
-
-                    # 跳过空行和注释行
-                    if not line or line.startswith("#") or line.startswith("regexp:"):
-                        continue
-
-                    # 转换域名格式
-                    adguard_line = self.convert_domain_to_adguard_format(line, dns_servers)
-                    if adguard_line:
-                        outfile.write(adguard_line + "\n")
-
-        except FileNotFoundError:
-            print(f"警告: 文件不存在 {input_filename}")
-        except Exception as e:
-            print(f"错误: 转换文件 {input_filename} 时出错 - {e}")
-
-    def convert_all_files(self) -> None:
-        """转换所有配置文件"""
-        print("开始转换配置文件为 AdGuardHome 兼容格式...")
-
-        # 转换国内文件
-        for filename in DOMESTIC_FILES:
-            output_filename = filename.replace(EXT_SOURCE, EXT_CONVERTED)
-            print(f"转换 {filename} -> {output_filename} (使用国内DNS: {' '.join(self.dns_config.domestic)})")
-            self.convert_file_to_adguard(filename, output_filename, self.dns_config.domestic)
+        # 用预编译正则在 C 层直接扫描内存映射的文件，避免逐行处理和整文件拷贝到堆内存
+        # （此处为字节串处理，Numba 无法加速，见模块文档中的设计原则）
+        domains: list[bytes] = []
+        with open(input_path, "rb") as infile:
+            # 空文件无法映射
+            if os.fstat(infile.fileno()).st_size:
+                with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    domains = DOMAIN_LINE_PATTERN.findall(data)
+        suffix = self._adguard_line_suffix(dns_servers)
+
+        # 合并时按字节偏移复制转换文件，因此每次都重新写入，不沿用磁盘上的旧文件（仅需数毫秒）
+        with open(output_path, "wb") as outfile:
+            # 添加注释说明
+            outfile.write(self._converted_file_header(input_filename, dns_servers))
+            outfile.write(self._format_adguard_lines(domains, suffix))
+
+        return domains
+
+    def _merge_converted_file(
+        self,
+        outfile: BinaryIO,
+        filename: str,
+        dns_servers: Sequence[str],
+        suffix: bytes,
+        domains: list[bytes],
+        seen: set[bytes],
+    ) -> int:
+        """将转换结果中未重复的域名写入合并文件，返回写入的行数"""
+        # 以裸域名去重；首个重复域名之前的行均未重复，可直接从转换文件整段拷贝到合并文件
+        seen_add = seen.add
+        unique_end = len(domains)
+        for index, domain in enumerate(domains):
+            if domain in seen:
+                unique_end = index
+                break
+            seen_add(domain)
+
+        # 其余部分逐个去重后收集，最后一次性写入
+        tail: list[bytes] = []
+        tail_append = tail.append
+        for domain in domains[unique_end:]:
+            if domain not in seen:
+                seen_add(domain)
+                tail_append(domain)
+
+        adg_path = self.configs_dir / CONVERTED_FILENAMES[filename]
+        header_size = len(self._converted_file_header(filename, dns_servers))
+        line_overhead = len(ADGUARD_LINE_PREFIX) + len(suffix)
+        unique_head = domains[:unique_end]
+        unique_size = line_overhead * len(unique_head) + sum(map(len, unique_head))
+
+        outfile.write(f"# 来源: {filename}\n".encode())
+        self._append_file_range(adg_path, outfile, header_size, unique_size)
+        outfile.write(self._format_adguard_lines(tail, suffix))
+        outfile.write(b"\n")
+        return unique_end + len(tail)
 
-        # 转换国外文件
-        for filename in FOREIGN_FILES:
-            output_filename = filename.replace(EXT_SOURCE, EXT_CONVERTED)
-            print(f"转换 {filename} -> {output_filename} (使用国外DNS: {' '.join(self.dns_config.foreign)})")
-            self.convert_file_to_adguard(filename, output_filename, self.dns_config.foreign)
+    @staticmethod
+    def _append_file_range(src_path: Path, dst: BinaryIO, offset: int, count: int) -> None:
+        """将文件指定区间追加写入 dst，优先使用 os.sendfile 在内核中完成拷贝"""
+        dst.flush()
+        with open(src_path, "rb") as src:
+            if hasattr(os, "sendfile"):
+                try:
+                    while count > 0:
+                        sent = os.sendfile(dst.fileno(), src.fileno(), offset, count)
+                        if sent == 0:
+                            break
+                        offset += sent
+                        count -= sent
+                    return
+                except OSError:
+                    # 部分平台（如 macOS）不支持文件到文件的 sendfile，回退为普通读写
+                    pass
+            src.seek(offset)
+            dst.write(src.read(count))
+
+    def _write_file_header(self, outfile: BinaryIO) -> None:
+        """写入合并文件头部信息"""
+        header = (
+            "# AdGuard Home 中国域名列表配置\n"
+            f"# 生成时间: {time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+        )
+        outfile.write(header.encode() + self._static_header)
 
-        print("转换完成！")
+    @staticmethod
+    def _find_subsumed_domains(groups: Sequence[tuple[Sequence[list[bytes]], bytes]]) -> set[bytes]:
+        """找出已被使用相同DNS的上级域名覆盖的子域名
 
-    def _write_file_header(self, outfile) -> None:
-        """写入合并文件头部信息"""
-        outfile.write("# AdGuard Home 中国域名列表配置\n")
-        outfile.write(f"# 生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        outfile.write("# 注意: 已自动去除重复域名配置\n\n")
-
-        # 推荐的上游安全DNS服务器
-        outfile.write("# 推荐的上游安全DNS服务器\n")
-        outfile.write("tcp://223.5.5.5\n")
-        outfile.write("tcp://119.29.29.29\n")
-        outfile.write("tcp://1.1.1.1\n")
-        outfile.write("tcp://8.8.8.8\n")
-        outfile.write("tls://dns.alidns.com\n")
-        outfile.write("tls://dot.pub\n")
-        outfile.write("tls://dns.google\n")
-        outfile.write("tls://one.one.one.one\n\n")
+        AdGuard Home 中 [/example.com/] 同时匹配其所有子域名，且以最长匹配为准，
+        因此一个域名最近的已列出上级域名若使用相同DNS，该域名的配置即为多余。
+        groups 为按优先级排列的 (各文件域名列表, 配置行后缀) 序列，域名重复时以先出现的为准。
+        """
+        # 域名 -> 实际生效的配置行后缀（即DNS服务器）
+        owners: dict[bytes, bytes] = {}
+        for domain_lists, suffix in reversed(groups):
+            owners.update(dict.fromkeys(chain.from_iterable(domain_lists), suffix))
+
+        subsumed: set[bytes] = set()
+        for domain, suffix in owners.items():
+            parent = domain
+            while True:
+                _, dot, parent = parent.partition(b".")
+                if not dot:
+                    break
+                parent_suffix = owners.get(parent)
+                if parent_suffix is not None:
+                    if parent_suffix == suffix:
+                        subsumed.add(domain)
+                    break
+        return subsumed
 
     def _process_domain_section(
         self,
-        outfile,
+        outfile: BinaryIO,
         files: list[str],
         dns_servers: list[str],
         section_name: str,
         stats: FileStats,
         is_domestic: bool,
+        results: dict[str, list[bytes]],
     ) -> None:
-        """处理并写入域名配置区块"""
-        outfile.write(f"# === {section_name} (使用DNS: {' '.join(dns_servers)}) ===\n")
+        """按文件顺序写入域名配置区块"""
+        suffix = self._adguard_line_suffix(dns_servers)
+        outfile.write(f"# === {section_name} (使用DNS: {' '.join(dns_servers)}) ===\n".encode())
 
         for filename in files:
-            adg_filename = filename.replace(EXT_SOURCE, EXT_CONVERTED)
-            adg_path = self.configs_dir / adg_filename
-
-            if not adg_path.exists():
+            domains = results.get(filename)
+            if domains is None:
                 continue
 
-            outfile.write(f"# 来源: {filename}\n")
-            with open(adg_path, "r", encoding="utf-8") as infile:
-                for line in infile:
-                    if not line.strip() or line.startswith("#"):
-                        continue
-
-                    domain_part = self._extract_domain_part(line)
-                    if domain_part and domain_part not in stats.unique_domains:
-                        stats.unique_domains.add(domain_part)
-                        outfile.write(line)
-                        if is_domestic:
-                            stats.domestic_count += 1
-                        else:
-                            stats.foreign_count += 1
-            outfile.write("\n")
-
-    @staticmethod
-    def _extract_domain_part(line: str) -> str | None:
-        """从配置行中提取域名部分用于去重"""
-        if "[" in line and "]" in line:
-            return line[line.find("[") : line.find("]") + 1]
-        return None
+            merged_count = self._merge_converted_file(
+                outfile, filename, dns_servers, suffix, domains, stats.unique_domains
+            )
+            if is_domestic:
+                stats.domestic_count += merged_count
+            else:
+                stats.foreign_count += merged_count
 
-    def create_merged_config(self) -> None:
-        """创建合并后的配置文件到输出根目录"""
+    def build_outputs(self) -> None:
+        """单次遍历源文件，同时生成转换文件和去重后的合并文件"""
         output_path = self.output_dir / OUTPUT_FILENAME
-        print(f"创建合并后的配置文件到: {output_path}")
+        print("开始转换配置文件为 AdGuardHome 兼容格式...")
 
-        # 删除旧文件
-        if output_path.exists():
-            print(f"删除旧的合并文件: {OUTPUT_FILENAME}")
-            output_path.unlink()
+        groups = [
+            ("国内", DOMESTIC_FILES, self.dns_config.domestic),
+            ("国外", FOREIGN_FILES, self.dns_config.foreign),
+        ]
 
+        # 正则扫描在 C 层完成，全部文件顺序转换也只需数十毫秒，进程池的启动和结果回传开销反而更大
+        results: dict[str, list[bytes]] = {}
+        for group_name, files, dns_servers in groups:
+            for filename in files:
+                adg_filename = CONVERTED_FILENAMES[filename]
+                print(f"转换 {filename} -> {adg_filename} "
+                      f"(使用{group_name}DNS: {' '.join(dns_servers)})")
+                try:
+                    results[filename] = self.convert_file_to_adguard(filename, adg_filename, dns_servers)
+                except FileNotFoundError:
+                    print(f"警告: 文件不存在 {filename}")
+                except Exception as e:
+                    print(f"错误: 转换文件 {filename} 时出错 - {e}")
+
+        print("转换完成！")
+        print(f"创建合并后的配置文件到: {output_path}")
+
+        # 先写入临时文件再原子替换旧文件，出错或中断时旧的合并文件保持完整
+        tmp_path = output_path.with_name(output_path.name + ".tmp")
         try:
             stats = FileStats()
 
-            with open(output_path, "w", encoding="utf-8") as outfile:
-                self._write_file_header(outfile)
-                self._process_domain_section(
-                    outfile, DOMESTIC_FILES, self.dns_config.domestic, "国内域名配置", stats, True
-                )
-                self._process_domain_section(
-                    outfile, FOREIGN_FILES, self.dns_config.foreign, "国外域名配置", stats, False
-                )
+            # 被同DNS上级域名覆盖的子域名预先计入已处理集合，合并时即被跳过
+            subsumed = self._find_subsumed_domains([
+                ([results[f] for f in files if f in results], self._adguard_line_suffix(dns_servers))
+                for _, files, dns_servers in groups
+            ])
+            stats.subsumed_count = len(subsumed)
+            stats.unique_domains.update(subsumed)
+
+            try:
+                with open(tmp_path, "wb", buffering=WRITE_BUFFER_SIZE) as outfile:
+                    self._write_file_header(outfile)
+                    self._process_domain_section(
+                        outfile, DOMESTIC_FILES, self.dns_config.domestic, "国内域名配置",
+                        stats, True, results,
+                    )
+                    self._process_domain_section(
+                        outfile, FOREIGN_FILES, self.dns_config.foreign, "国外域名配置",
+                        stats, False, results,
+                    )
+                os.replace(tmp_path, output_path)
+            except BaseException:
+                # 包括 Ctrl-C 在内的任何中断都删除临时文件
+                tmp_path.unlink(missing_ok=True)
+                raise
 
             print("合并文件创建完成！")
             print(f"去重统计: 国内域名 {stats.domestic_count} 个, "
-                  f"国外域名 {stats.foreign_count} 个, 总计 {stats.total_unique} 个唯一域名")
+                  f"国外域名 {stats.foreign_count} 个, 总计 {stats.total_unique} 个唯一域名, "
+                  f"另有 {stats.subsumed_count} 个子域名已被上级域名覆盖而省略")
 
         except Exception as e:
             print(f"错误: 创建合并文件时出错 - {e}")
             sys.exit(1)
 
-    def _list_files_with_status(self, files: list[str], subdir: Path) -> None:
+    @staticmethod
+    def _list_dir_names(path: Path) -> set[str]:
+        """读取一次目录，返回其中的文件名集合，目录不存在时返回空集合"""
+        try:
+            with os.scandir(path) as entries:
+                return {entry.name for entry in entries}
+        except FileNotFoundError:
+            return set()
+
+    def _list_files_with_status(self, files: list[str], present: set[str]) -> None:
         """列出文件及其存在状态"""
         for filename in files:
-            file_path = subdir / filename
-            status = "✓" if file_path.exists() else "✗"
+            status = "✓" if filename in present else "✗"
             print(f"- {filename} {status}")
 
     def show_summary(self) -> None:
@@ -492,13 +902,12 @@ class AdGuardConfigConverter:
         print(f"configs子目录: {self.configs_dir}")
 
         print("\nconfigs子目录中的文件:")
+        # 一次目录读取代替逐个文件的 stat
+        present = self._list_dir_names(self.configs_dir)
         # 显示原始文件
-        self._list_files_with_status(DOMESTIC_FILES + FOREIGN_FILES, self.configs_dir)
+        self._list_files_with_status(DOMESTIC_FILES + FOREIGN_FILES, present)
         # 显示转换后文件
-        converted_files = [
-            f.replace(EXT_SOURCE, EXT_CONVERTED) for f in DOMESTIC_FILES + FOREIGN_FILES
-        ]
-        self._list_files_with_status(converted_files, self.configs_dir)
+        self._list_files_with_status(list(CONVERTED_FILENAMES.values()), present)
 
         print(f"\n输出根目录中的文件:")
         merged_path = self.output_dir / OUTPUT_FILENAME
@@ -518,11 +927,10 @@ class AdGuardConfigConverter:
             if not file_path.exists():
                 return
             print(f"\n合并后文件的前{max_lines}行预览：")
-            with open(file_path, "r", encoding="utf-8") as f:
-                for i, line in enumerate(f):
-                    if i >= max_lines:
-                        break
-                    print(line.rstrip())
+            # 一次读取文件开头，切分后取前若干行
+            with open(file_path, "rb") as f:
+                head = f.read(PREVIEW_READ_SIZE)
+            print(b"\n".join(head.splitlines()[:max_lines]).decode("utf-8", "replace"))
         except Exception as e:
             print(f"无法读取预览文件: {e}")
 
@@ -542,8 +950,7 @@ class AdGuardConfigConverter:
             if not self.download_all_files(base_url):
                 print("警告: 部分文件下载失败，但仍继续处理已下载的文件")
 
-            self.convert_all_files()
-            self.create_merged_config()
+            self.build_outputs()
             self.show_summary()
 
         except KeyboardInterrupt: